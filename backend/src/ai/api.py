@@ -2,6 +2,7 @@ import logging
 from typing import Optional
 
 import httpx
+import orjson
 
 from src.settings import settings
 
@@ -9,8 +10,14 @@ logger = logging.getLogger(__name__)
 
 
 TIMEOUT = 180
+CONNECT_TIMEOUT = 5
 
-model_client = httpx.AsyncClient()
+# shared across requests so concurrent calls reuse pooled http/2 connections
+model_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+)
 
 
 async def _core_send_request(
@@ -40,10 +47,12 @@ async def send_openai_request(
     url = f"https://api.openai.com/v1/{route}"
     request_params = {
         "headers": {"Authorization": f"Bearer {settings.openai_api_key}"},
-        "timeout": httpx.Timeout(timeout),
+        "timeout": httpx.Timeout(timeout, connect=CONNECT_TIMEOUT),
     }
     if request_payload:
-        request_params["json"] = request_payload
+        # encode with orjson rather than httpx's stdlib json encoder
+        request_params["content"] = orjson.dumps(request_payload)
+        request_params["headers"]["Content-Type"] = "application/json"
     if files:
         request_params["files"] = files
     if data:
@@ -2,14 +2,16 @@ import asyncio
 import audioop
 import base64
 import io
-import json
 import logging
 import os
+import shutil
 import time
 import zipfile
+from collections import deque
 from contextlib import AsyncExitStack
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 from typing import (
     AsyncContextManager,
@@ -22,6 +24,7 @@ from typing import (
 )
 
 import aiofiles
+import orjson
 import websockets
 from pydantic import BaseModel, Field
 from pydantic.json import pydantic_encoder
@@ -33,8 +36,8 @@ from src.ai.prompts import (
     text_message_tool,
     transfer_call_tool,
 )
-from src.audio.data_processing import audio_bytes_to_ms
-from src.aws_utils import S3Client
+from src.audio.data_processing import b64_audio_to_ms
+from src.aws_utils import get_shared_s3_client
 from src.db.api import update_phone_call
 from src.db.base import async_session_scope
 from src.helixion_types import (
@@ -51,6 +54,36 @@ from src.settings import settings
 
 logger = logging.getLogger(__name__)
 
+LOG_FLUSH_INTERVAL_S = 0.25
+LOG_FLUSH_MAX_ENTRIES = 64
+SPEAKER_SNAPSHOT_INTERVAL_S = 5
+MESSAGE_QUEUE_MAX_SIZE = 256  # ~5s of 20ms audio frames
+MESSAGE_QUEUE_DRAIN_MAX_ITEMS = 8
+AUDIO_INPUT_BUFFER_RETENTION_MS = 5000
+LOG_ZIP_CHUNK_SIZE = 1 << 20
+SESSION_INSTRUCTIONS_PLACEHOLDER = "__INSTRUCTIONS__"
+SESSION_TOOLS_PLACEHOLDER = "__TOOLS__"
+AUDIO_APPEND_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+AUDIO_APPEND_SUFFIX = b'"}'
+
+
+_last_timestamp_ms = 0
+_last_timestamp = ""
+
+
+def _dumps(obj: object) -> bytes:
+    return orjson.dumps(obj, default=pydantic_encoder)
+
+
+def _now_iso() -> str:
+    # frames logged within the same millisecond share a formatted timestamp
+    global _last_timestamp_ms, _last_timestamp
+    timestamp_ms = time.monotonic_ns() // 1_000_000
+    if timestamp_ms != _last_timestamp_ms:
+        _last_timestamp_ms = timestamp_ms
+        _last_timestamp = datetime.now().isoformat()
+    return _last_timestamp
+
 
 class TurnDetection(BaseModel):
     type: Literal["server_vad"] = "server_vad"
@@ -118,13 +151,23 @@ class AiSessionConfiguration(BaseModel):
         )
 
 
+@lru_cache(maxsize=None)
+def _session_update_template(audio_format: AudioFormat) -> bytes:
+    # everything except the instructions and tools is fixed per audio format
+    session = AiSessionConfiguration.create(
+        SESSION_INSTRUCTIONS_PLACEHOLDER, {}, audio_format, {}
+    ).model_dump()
+    session["tools"] = SESSION_TOOLS_PLACEHOLDER
+    return _dumps({"type": "session.update", "session": session})
+
+
 class AiMessage(BaseModel):
     type: AiMessageEventTypes
-    data: Union[str, BaseModel, None, Sequence[BaseModel]]
+    data: Union[str, bytes, BaseModel, None, Sequence[BaseModel]]
     metadata: dict
 
     @property
-    def serialized(self) -> str:
+    def serialized(self) -> bytes:
         if (
             self.type == AiMessageEventTypes.audio
             or self.type == AiMessageEventTypes.call_end
@@ -133,45 +176,53 @@ class AiMessage(BaseModel):
                 pcm_data = base64.b64decode(cast(str, self.data))
                 pcm_16bit = audioop.ulaw2lin(pcm_data, 2)
                 self.data = base64.b64encode(pcm_16bit).decode("utf-8")
+            return orjson.dumps(
+                {
+                    "type": self.type.value,
+                    "data": self.data,
+                },
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+        elif self.type == AiMessageEventTypes.speaker_delta:
+            # data is the pre-serialized segment
             return (
-                json.dumps(
-                    {
-                        "type": self.type.value,
-                        "data": self.data,
-                    },
-                )
-                + "\n"
+                b'{"type":"speaker_delta","data":{"index":'
+                + str(self.metadata["index"]).encode()
+                + b',"segment":'
+                + cast(bytes, self.data)
+                + b"}}\n"
             )
         else:
+            # data is the pre-serialized list of segments
             return (
-                json.dumps(
-                    {
-                        "type": self.type.value,
-                        "data": [
-                            segment.model_dump()
-                            for segment in cast(
-                                Sequence[SpeakerSegment], self.data
-                            )
-                        ],
-                    },
-                    default=pydantic_encoder,
-                )
-                + "\n"
+                b'{"type":"speaker","data":' + cast(bytes, self.data) + b"}\n"
             )
 
 
 class AiMessageQueue:
     queue: asyncio.Queue[AiMessage]
+    dropped: int
 
     def __init__(self):
-        self.queue = asyncio.Queue()
+        self.queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_MAX_SIZE)
+        self.dropped = 0
 
     def add_data(
         self,
         event_type: AiMessageEventTypes,
-        event_data: Union[str, BaseModel, None, Sequence[BaseModel]],
+        event_data: Union[str, bytes, BaseModel, None, Sequence[BaseModel]],
         metadata: Optional[dict] = None,
     ):
+        if self.queue.full():
+            # drop the oldest message so a slow or absent listener can't
+            # grow memory for the length of the call, with no listener this
+            # is the normal case so only log at debug level
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped % MESSAGE_QUEUE_MAX_SIZE == 1:
+                logger.debug(
+                    f"Message queue full, dropped {self.dropped} messages"
+                )
         self.queue.put_nowait(
             AiMessage(
                 type=event_type,
@@ -180,6 +231,15 @@ class AiMessageQueue:
             )
         )
 
+    async def drain(
+        self, max_items: int = MESSAGE_QUEUE_DRAIN_MAX_ITEMS
+    ) -> list[AiMessage]:
+        # wait for one message, then take whatever else is already queued
+        messages = [await self.queue.get()]
+        while len(messages) < max_items and not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
     def end_call(self):
         self.add_data(
             AiMessageEventTypes.call_end,
@@ -211,7 +271,10 @@ class AiCaller(AsyncContextManager["AiCaller"]):
         )
         self._sampling_rate = 24000 if self._audio_format == "pcm16" else 8000
         self._bytes_per_sample = 2 if self._audio_format == "pcm16" else 1
-        self._log_tasks: list[asyncio.Task] = []
+        self._log_buffer: list[str] = []
+        self._log_lock = asyncio.Lock()
+        self._log_flush_event = asyncio.Event()
+        self._log_flush_task: Optional[asyncio.Task] = None
         self._cleanup_started = False
         self.phone_call_id = phone_call_id
         self._audio_input_buffer_ms: int = (
@@ -220,9 +283,12 @@ class AiCaller(AsyncContextManager["AiCaller"]):
             else 0
         )
         self._audio_total_buffer_ms: int = 0
-        self._audio_input_buffer: list[tuple[str, int, int]] = []
+        self._audio_input_buffer: deque[tuple[str, int, int]] = deque()
         self._user_speaking: bool = False
         self._speaker_segments: list[SpeakerSegment] = []
+        self._speaker_segment_indices: dict[str, int] = {}
+        self._speaker_segments_json: list[bytes] = []
+        self._speaker_snapshot_time: float = 0
 
         self._message_queue: Optional[AiMessageQueue] = None
 
@@ -239,8 +305,14 @@ class AiCaller(AsyncContextManager["AiCaller"]):
                 },
             )
         )
-        await self.initialize_session()
         self._log_file = f"logs/{self.phone_call_id}.log"
+        Path(self._log_file).parent.mkdir(parents=True, exist_ok=True)
+        # the session update is only buffered, start flushing once it has
+        # been sent so a failed send doesn't leave the flush task running
+        await self.initialize_session()
+        self._log_flush_task = asyncio.create_task(
+            self._flush_log_periodically()
+        )
         logger.info(f"Initialized session with {self._log_file=}")
         return self
 
@@ -261,56 +333,112 @@ class AiCaller(AsyncContextManager["AiCaller"]):
     def log_file(self) -> str:
         if not self._log_file:
             raise RuntimeError("Log file not initialized")
-        Path(self._log_file).parent.mkdir(parents=True, exist_ok=True)
         return self._log_file
 
     async def initialize_session(self):
-        session_update = {
-            "type": "session.update",
-            "session": self.session_configuration.model_dump(),
-        }
-        await self.send_message(json.dumps(session_update))
-
-    async def _log_message(self, message: websockets.Data):
-        # Ensure log directory exists
-        timestamp = datetime.now().isoformat()
-        log_entry = f"[{timestamp}] {message}\n"
-        try:
-            async with aiofiles.open(self.log_file, mode="a") as f:
-                await f.write(log_entry)
-        except Exception:
-            logger.exception("Error writing to log file")
+        session_update = (
+            _session_update_template(self._audio_format)
+            .replace(
+                _dumps(SESSION_INSTRUCTIONS_PLACEHOLDER),
+                _dumps(self.session_configuration.instructions),
+                1,
+            )
+            .replace(
+                _dumps(SESSION_TOOLS_PLACEHOLDER),
+                _dumps(self.session_configuration.tools),
+                1,
+            )
+        )
+        await self.send_message(session_update)
+
+    def _log_message(self, message: websockets.Data):
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        timestamp = _now_iso()
+        self._log_buffer.append(f"[{timestamp}] {message}\n")
+        if len(self._log_buffer) >= LOG_FLUSH_MAX_ENTRIES:
+            self._log_flush_event.set()
+
+    async def _flush_log(self):
+        async with self._log_lock:
+            if len(self._log_buffer) == 0:
+                return
+            # swap the buffer so new entries are not lost during the write
+            log_entries, self._log_buffer = self._log_buffer, []
+            try:
+                async with aiofiles.open(self.log_file, mode="a") as f:
+                    await f.write("".join(log_entries))
+            except Exception:
+                logger.exception("Error writing to log file")
+
+    async def _flush_log_periodically(self):
+        while not self._cleanup_started:
+            try:
+                await asyncio.wait_for(
+                    self._log_flush_event.wait(), timeout=LOG_FLUSH_INTERVAL_S
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._log_flush_event.clear()
+            await self._flush_log()
+
+    def _cache_speaker_segment_json(self, index: int):
+        # serialize straight to json without building an intermediate dict
+        segment_json = self._speaker_segments[index].model_dump_json().encode()
+        if index == len(self._speaker_segments_json):
+            self._speaker_segments_json.append(segment_json)
+        else:
+            self._speaker_segments_json[index] = segment_json
+
+    @property
+    def speaker_segments_json(self) -> bytes:
+        return b"[" + b",".join(self._speaker_segments_json) + b"]"
 
     def _update_speaker_segments(self, speaker_segment: SpeakerSegment):
         # check if the speaker segment exists in the list
-        found = False
-        for segment in self._speaker_segments:
-            if segment.item_id == speaker_segment.item_id:
-                segment.transcript = speaker_segment.transcript
-                found = True
-                break
-
-        if not found:
+        index = self._speaker_segment_indices.get(speaker_segment.item_id)
+        if index is not None:
+            self._speaker_segments[index].transcript = (
+                speaker_segment.transcript
+            )
+        else:
+            index = len(self._speaker_segments)
             self._speaker_segments.append(speaker_segment)
+            self._speaker_segment_indices[speaker_segment.item_id] = index
+        self._cache_speaker_segment_json(index)
 
         if self._message_queue is not None:
-            self._message_queue.add_data(
-                AiMessageEventTypes.speaker,
-                self._speaker_segments,
-            )
+            # send the changed segment only, with a periodic full snapshot
+            # so listeners that missed an update can resync
+            now = time.monotonic()
+            if (
+                now - self._speaker_snapshot_time
+                >= SPEAKER_SNAPSHOT_INTERVAL_S
+            ):
+                self._speaker_snapshot_time = now
+                self._message_queue.add_data(
+                    AiMessageEventTypes.speaker,
+                    self.speaker_segments_json,
+                )
+            else:
+                self._message_queue.add_data(
+                    AiMessageEventTypes.speaker_delta,
+                    self._speaker_segments_json[index],
+                    metadata={"index": index},
+                )
 
     async def _start_speaking_message(self):
         conversation_start_event = {
             "type": "response.create",
             "response": {},
         }
-        await self.send_message(json.dumps(conversation_start_event))
+        await self.send_message(_dumps(conversation_start_event))
         self._start_speaking_buffer_ms = None
 
-    async def send_message(self, message: str) -> None:
-        await self.client.send(message)
-        task = asyncio.create_task(self._log_message(message))
-        self._log_tasks.append(task)
+    async def send_message(self, message: Union[str, bytes]) -> None:
+        # always send as a text frame, bytes are utf-8 encoded json
+        await self.client.send(message, text=True)
+        self._log_message(message)
 
     async def truncate_message(self, item_id: str, audio_end_ms: int):
         truncate_event = {
@@ -319,7 +447,7 @@ class AiCaller(AsyncContextManager["AiCaller"]):
             "content_index": 0,
             "audio_end_ms": audio_end_ms,
         }
-        await self.send_message(json.dumps(truncate_event))
+        await self.send_message(_dumps(truncate_event))
 
     async def receive_tool_call_result(
         self,
@@ -336,21 +464,32 @@ class AiCaller(AsyncContextManager["AiCaller"]):
                 "output": output,
             },
         }
-        await self.send_message(json.dumps(tool_call_result_event))
+        await self.send_message(_dumps(tool_call_result_event))
         await self._start_speaking_message()
 
     def _audio_ms(self, audio_b64: str) -> int:
-        audio_bytes = base64.b64decode(audio_b64)
-        return audio_bytes_to_ms(
-            audio_bytes, self._bytes_per_sample, self._sampling_rate
+        return b64_audio_to_ms(
+            audio_b64, self._bytes_per_sample, self._sampling_rate
         )
 
     async def receive_human_audio(self, audio: str):
-        audio_append = {
-            "type": "input_audio_buffer.append",
-            "audio": audio,
-        }
-        await self.send_message(json.dumps(audio_append))
+        # base64 audio needs no json escaping, so splice it into the frame
+        # directly unless the client sent something that would need it,
+        # these checks run in c unlike a regex over the whole frame
+        if audio.isascii() and '"' not in audio and "\\" not in audio:
+            audio_append = (
+                AUDIO_APPEND_PREFIX
+                + audio.encode("ascii")
+                + AUDIO_APPEND_SUFFIX
+            )
+        else:
+            audio_append = _dumps(
+                {
+                    "type": "input_audio_buffer.append",
+                    "audio": audio,
+                }
+            )
+        await self.send_message(audio_append)
 
         # if start speaking buffer is enabled, check if we need to send a start speaking message
         if (
@@ -380,11 +519,18 @@ class AiCaller(AsyncContextManager["AiCaller"]):
             self._audio_input_buffer.append(
                 (audio, audio_ms, self._audio_input_buffer_ms)
             )
+            # only audio shortly before speech starts is replayed, so drop
+            # older entries instead of holding the whole silent prefix
+            while (
+                self._audio_input_buffer[0][2]
+                < self._audio_input_buffer_ms - AUDIO_INPUT_BUFFER_RETENTION_MS
+            ):
+                self._audio_input_buffer.popleft()
 
     async def _message_handler(self, message: websockets.Data) -> dict:
-        asyncio.create_task(self._log_message(message))
+        self._log_message(message)
 
-        response = json.loads(message)
+        response = orjson.loads(message)
 
         if response["type"] == "input_audio_buffer.speech_started":
             self._start_speaking_buffer_ms = (
@@ -392,7 +538,7 @@ class AiCaller(AsyncContextManager["AiCaller"]):
             )
             self._user_speaking = True
             self._update_speaker_segments(
-                SpeakerSegment(
+                SpeakerSegment.model_construct(
                     timestamp=self._audio_total_buffer_ms / 1000,
                     speaker=Speaker.user,
                     transcript="",
@@ -409,11 +555,11 @@ class AiCaller(AsyncContextManager["AiCaller"]):
                             audio,
                             metadata={"audio_format": self._audio_format},
                         )
-            self._audio_input_buffer = []
+            self._audio_input_buffer.clear()
         elif response["type"] == "input_audio_buffer.speech_stopped":
             self._user_speaking = False
             self._update_speaker_segments(
-                SpeakerSegment(
+                SpeakerSegment.model_construct(
                     timestamp=self._audio_total_buffer_ms / 1000,
                     speaker=Speaker.assistant,
                     transcript="",
@@ -437,30 +583,37 @@ class AiCaller(AsyncContextManager["AiCaller"]):
                 len(self._speaker_segments) > 0
                 and self._speaker_segments[-1].item_id == ""
             ):
+                last_index = len(self._speaker_segments) - 1
+                if self._speaker_segment_indices.get("") == last_index:
+                    del self._speaker_segment_indices[""]
                 self._speaker_segments[-1].item_id = response["item_id"]
+                self._speaker_segment_indices.setdefault(
+                    response["item_id"], last_index
+                )
+                self._cache_speaker_segment_json(last_index)
         elif (
             response["type"]
             == "conversation.item.input_audio_transcription.completed"
         ):
             self._update_speaker_segments(
-                SpeakerSegment(
-                    timestamp=0,  # this value is not used
+                SpeakerSegment.model_construct(
+                    timestamp=0.0,  # this value is not used
                     speaker=Speaker.user,
                     transcript=response["transcript"],
                     item_id=response["item_id"],
                 ),
             )
-            response["speaker_segments"] = self._speaker_segments
+            response["speaker_segments_json"] = self.speaker_segments_json
         elif response["type"] == "response.audio_transcript.done":
             self._update_speaker_segments(
-                SpeakerSegment(
-                    timestamp=0,  # this value is not used
+                SpeakerSegment.model_construct(
+                    timestamp=0.0,  # this value is not used
                     speaker=Speaker.assistant,
                     transcript=response["transcript"],
                     item_id=response["item_id"],
                 ),
             )
-            response["speaker_segments"] = self._speaker_segments
+            response["speaker_segments_json"] = self.speaker_segments_json
         elif response["type"] == "session.updated":
             # initialize start speaking buffer
             if self._start_speaking_buffer_ms is not None:
@@ -475,6 +628,40 @@ class AiCaller(AsyncContextManager["AiCaller"]):
 
         return response
 
+    async def _stop_log_flush(self):
+        if self._log_flush_task is not None:
+            # wake up the flush task so it exits
+            self._log_flush_event.set()
+            await self._log_flush_task
+            self._log_flush_task = None
+        await self._flush_log()
+
+    async def _save_phone_call(
+        self, s3_filepath: str, phone_call_end_reason: PhoneCallEndReason
+    ):
+        async with async_session_scope() as db:
+            await update_phone_call(
+                self.phone_call_id,
+                s3_filepath,
+                phone_call_end_reason,
+                db,
+            )
+
+    def _zip_log_file(self) -> bytes:
+        # Create zip file in memory, streaming the log in chunks so only the
+        # compressed data is held in memory
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(
+            zip_buffer, "w", zipfile.ZIP_DEFLATED
+        ) as zip_file:
+            # Add log file to zip with just the filename
+            with (
+                open(self.log_file, mode="rb") as log_f,
+                zip_file.open(Path(self.log_file).name, mode="w") as zip_f,
+            ):
+                shutil.copyfileobj(log_f, zip_f, LOG_ZIP_CHUNK_SIZE)
+        return zip_buffer.getvalue()
+
     async def close(
         self, phone_call_end_reason: PhoneCallEndReason
     ) -> tuple[SerializedUUID, int]:
@@ -483,48 +670,30 @@ class AiCaller(AsyncContextManager["AiCaller"]):
             return self.phone_call_id, self._audio_total_buffer_ms
         self._cleanup_started = True
 
-        if self._ws_client is not None:
-            await self._ws_client.close()
-
         # close the queues
         if self._message_queue is not None:
             self._message_queue.end_call()
 
-        if len(self._log_tasks) > 0:
-            logger.info(f"Flushing {len(self._log_tasks)} log tasks")
-            await asyncio.gather(*self._log_tasks, return_exceptions=True)
-
-        async with S3Client() as s3_client:
-            # Create zip file in memory
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(
-                zip_buffer, "w", zipfile.ZIP_DEFLATED
-            ) as zip_file:
-                async with aiofiles.open(self.log_file, mode="rb") as f:
-                    data = await f.read()
-                    # Add log file to zip with just the filename
-                    zip_file.writestr(Path(self.log_file).name, data)
-
-            # Reset buffer position
-            zip_buffer.seek(0)
-            zip_data = zip_buffer.getvalue()
-
-            # Upload zipped file
-            s3_filepath = f"s3://clinicontact/logs/{self.phone_call_id}.zip"
-            await s3_client.upload_file(
-                zip_data, s3_filepath, "application/zip"
-            )
+        # closing the connection and flushing the log are independent
+        shutdown_steps = [self._stop_log_flush()]
+        if self._ws_client is not None:
+            shutdown_steps.append(self._ws_client.close())
+        await asyncio.gather(*shutdown_steps)
 
-        async with async_session_scope() as db:
-            await update_phone_call(
-                self.phone_call_id,
-                s3_filepath,
-                phone_call_end_reason,
-                db,
-            )
-        # delete the file
-        os.remove(self.log_file)
-        self._log_tasks.clear()
+        # compress off the event loop while getting the s3 client
+        zip_data, s3_client = await asyncio.gather(
+            asyncio.to_thread(self._zip_log_file), get_shared_s3_client()
+        )
+
+        # Upload zipped file
+        s3_filepath = f"s3://clinicontact/logs/{self.phone_call_id}.zip"
+        await s3_client.upload_file(zip_data, s3_filepath, "application/zip")
+
+        # the db only references the uploaded file, the local copy can go
+        await asyncio.gather(
+            self._save_phone_call(s3_filepath, phone_call_end_reason),
+            asyncio.to_thread(os.remove, self.log_file),
+        )
         self._log_file = None
         return self.phone_call_id, self._audio_total_buffer_ms
 
@@ -17,6 +17,18 @@ from src.helixion_types import (
 document_cache: LRUCache[str, list[tuple[str, str]]] = LRUCache(maxsize=10)
 document_cache_lock = asyncio.Lock()
 
+document_query_system_chat = ModelChat(
+    role=ModelChatType.system,
+    content="""
+- You are a helpful assistant that answers a user's question using the documents you have access to.
+- Be concise and to the point
+- You will be given a query and a set of documents.
+- You will need to answer the query using the information in the documents only.
+- If you cannot answer the query using the documents, you should say so
+- Only return the answer, do not include any other text
+""",
+)
+
 
 async def _get_documents(
     knowledge_base_ids: list[SerializedUUID],
@@ -43,23 +55,11 @@ async def _get_documents(
 async def _model_query_documents(
     query: str, documents: list[tuple[str, str]]
 ) -> str:
-    system_prompt = """
-- You are a helpful assistant that answers a user's question using the documents you have access to.
-- Be concise and to the point
-- You will be given a query and a set of documents.
-- You will need to answer the query using the information in the documents only.
-- If you cannot answer the query using the documents, you should say so
-- Only return the answer, do not include any other text
-"""
-
     documents_fmt = "\n".join(
         [f"#### {doc_name}\n{doc_text}" for doc_name, doc_text in documents]
     )
     model_chat = [
-        ModelChat(
-            role=ModelChatType.system,
-            content=system_prompt,
-        ),
+        document_query_system_chat,
         ModelChat(
             role=ModelChatType.user,
             content=f"### Documents\n{documents_fmt}\n\n### Query\n{query}",
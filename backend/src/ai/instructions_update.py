@@ -7,21 +7,22 @@ from src.helixion_types import (
     Prediction,
 )
 
-
-async def generate_updated_instructions_from_report(
-    instructions: str, report: str
-) -> str:
-    system_prompt = f"""
+instructions_update_system_chat = ModelChat(
+    role=ModelChatType.system,
+    content="""
 - You are given a `report` of an analysis of previous calls and `instructions` for an AI call agent
 - Your task is to update the `instructions` based on the `report`
 - Do not remove instructions unless they directly contradict the report
 - Only return the updated `instructions`, do not include any other text
-"""
+""",
+)
+
+
+async def generate_updated_instructions_from_report(
+    instructions: str, report: str
+) -> str:
     model_chat = [
-        ModelChat(
-            role=ModelChatType.system,
-            content=system_prompt,
-        ),
+        instructions_update_system_chat,
         ModelChat(
             role=ModelChatType.user,
             content=f"### Report\n{report}\n\n### Instructions\n{instructions}",
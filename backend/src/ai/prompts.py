@@ -13,6 +13,14 @@ sample_values_prompt = """
 - return the fields and values in a JSON object
 """
 
+sample_values_batch_prompt = """
+- you will be given several numbered requests, each with its own `fields`
+- for each request provide a sample value for each of its `fields`
+- the values should be realistic and believable across all `fields` of a request
+- each individual field value should be a string
+- return a JSON object with a `requests` key containing a list with one JSON object of fields and values per request, in the same order as the requests
+"""
+
 
 hang_up_tools = [
     {
@@ -1,7 +1,13 @@
-import json
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+import orjson
+from cachetools import TTLCache
 
 from src.ai.api import send_openai_request
-from src.ai.prompts import sample_values_prompt
+from src.ai.prompts import sample_values_batch_prompt, sample_values_prompt
 from src.helixion_types import (
     ModelChat,
     ModelChatType,
@@ -10,31 +16,164 @@ from src.helixion_types import (
     ResponseType,
 )
 
+logger = logging.getLogger(__name__)
+
+SAMPLE_VALUES_BATCH_WINDOW_S = 0.25
+SAMPLE_VALUES_BATCH_MAX_SIZE = 8
+SAMPLE_VALUES_CACHE_TTL_S = 24 * 60 * 60
+
+SampleValuesBatchItem = tuple[list[str], asyncio.Future]
+
+_batch_queue: Optional[asyncio.Queue[SampleValuesBatchItem]] = None
+_batch_worker: Optional[asyncio.Task] = None
+_batch_tasks: set[asyncio.Task] = set()
+
+sample_values_cache: TTLCache[str, dict] = TTLCache(
+    maxsize=1024, ttl=SAMPLE_VALUES_CACHE_TTL_S
+)
+
+
+def _sample_values_cache_key(fields: list[str]) -> str:
+    return hashlib.blake2b(
+        "\n".join(sorted(fields)).encode(), digest_size=16
+    ).hexdigest()
 
-async def generate_sample_values(fields: list[str]) -> dict:
-    fmt_payload = "\n".join([f"- {field}" for field in fields])
-
-    model_chat = [
-        ModelChat(
-            role=ModelChatType.system,
-            content=sample_values_prompt,
-        ),
-        ModelChat(
-            role=ModelChatType.user,
-            content=fmt_payload,
-        ),
-    ]
 
+def _build_request_template(system_prompt: str) -> dict:
     model_payload = OpenAiChatInput(
-        messages=model_chat,
+        messages=[
+            ModelChat(
+                role=ModelChatType.system,
+                content=system_prompt,
+            ),
+        ],
         model=ModelType.gpt4o_mini,
         response_format=ResponseType(),
     )
+    return model_payload.data
+
+
+# only the user message changes between calls, so validate the rest once
+SAMPLE_VALUES_TEMPLATE = _build_request_template(sample_values_prompt)
+SAMPLE_VALUES_BATCH_TEMPLATE = _build_request_template(
+    sample_values_batch_prompt
+)
+
+
+async def _send_sample_values_request(template: dict, content: str) -> dict:
+    request_payload = {
+        **template,
+        "messages": [
+            *template["messages"],
+            {"role": ModelChatType.user, "content": content},
+        ],
+    }
 
     response = await send_openai_request(
-        model_payload.data,
+        request_payload,
         "chat/completions",
     )
 
-    output = json.loads(response["choices"][0]["message"]["content"])
+    output = orjson.loads(response["choices"][0]["message"]["content"])
     return output
+
+
+_format_field = "- {}".format
+
+
+def _format_fields(fields: list[str]) -> str:
+    return "\n".join(map(_format_field, fields))
+
+
+async def _generate_single_sample_values(fields: list[str]) -> dict:
+    return await _send_sample_values_request(
+        SAMPLE_VALUES_TEMPLATE, _format_fields(fields)
+    )
+
+
+async def _generate_batch_sample_values(
+    batch: list[list[str]],
+) -> list[dict]:
+    fmt_payload = "\n\n".join(
+        [
+            f"### Request {i}\n{_format_fields(fields)}"
+            for i, fields in enumerate(batch, start=1)
+        ]
+    )
+    output = await _send_sample_values_request(
+        SAMPLE_VALUES_BATCH_TEMPLATE, fmt_payload
+    )
+    results = output.get("requests")
+    # the model can reorder or drop requests, so every answer must cover
+    # the fields of the request it is handed to
+    if (
+        not isinstance(results, list)
+        or len(results) != len(batch)
+        or not all(
+            isinstance(result, dict) and set(fields) <= result.keys()
+            for fields, result in zip(batch, results)
+        )
+    ):
+        logger.warning(
+            "batched sample values did not line up, retrying individually"
+        )
+        return await asyncio.gather(
+            *[_generate_single_sample_values(fields) for fields in batch]
+        )
+    return results
+
+
+async def _resolve_batch(batch: list[SampleValuesBatchItem]) -> None:
+    try:
+        if len(batch) == 1:
+            results = [await _generate_single_sample_values(batch[0][0])]
+        else:
+            results = await _generate_batch_sample_values(
+                [fields for fields, _ in batch]
+            )
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    for (_, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+
+async def _process_batches(queue: asyncio.Queue[SampleValuesBatchItem]):
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + SAMPLE_VALUES_BATCH_WINDOW_S
+        while len(batch) < SAMPLE_VALUES_BATCH_MAX_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # resolve in the background so the next window can start collecting
+        task = asyncio.create_task(_resolve_batch(batch))
+        _batch_tasks.add(task)
+        task.add_done_callback(_batch_tasks.discard)
+
+
+async def generate_sample_values(fields: list[str]) -> dict:
+    global _batch_queue, _batch_worker
+    cache_key = _sample_values_cache_key(fields)
+    cached = sample_values_cache.get(cache_key)
+    if cached is not None:
+        # hand out a copy so callers can't modify the cached dict
+        return dict(cached)
+
+    if _batch_queue is None or _batch_worker is None or _batch_worker.done():
+        _batch_queue = asyncio.Queue()
+        _batch_worker = asyncio.create_task(_process_batches(_batch_queue))
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _batch_queue.put_nowait((fields, future))
+    output = await future
+    sample_values_cache[cache_key] = output
+    return dict(output)
@@ -1,12 +1,12 @@
-import json
+import asyncio
 import logging
 import time
 import uuid
 from typing import Optional, Union
 
+import orjson
 import websockets
 from fastapi import WebSocket
-from fastapi.encoders import jsonable_encoder
 from fastapi.websockets import WebSocketDisconnect, WebSocketState
 
 from src.ai.caller import AiCaller
@@ -32,6 +32,9 @@ from src.twilio_utils import (
 
 logger = logging.getLogger(__name__)
 
+MEDIA_BATCH_WINDOW_S = 0.002
+TWILIO_MEDIA_SUFFIX = '"}}'
+
 
 class CallRouter:
     agent_id: SerializedUUID
@@ -39,6 +42,8 @@ class CallRouter:
     from_phone_number: str
     to_phone_number: str
     stream_sid: Union[str, None]
+    _media_prefix: str
+    _mark_event: str
     last_ai_item_id: Union[str, None]
     mark_queue: list[int]
     mark_queue_elapsed_time: int
@@ -61,7 +66,7 @@ class CallRouter:
         self.from_phone_number = from_phone_number
         self.to_phone_number = to_phone_number
         self.call_sid = call_sid
-        self.stream_sid = None
+        self._set_stream_sid(None)
         self.last_ai_item_id = None
         self.mark_queue = []
         self.mark_queue_elapsed_time = 0
@@ -70,6 +75,20 @@ class CallRouter:
         self._hang_up_reason = None
         self.call_type = call_type
 
+    def _set_stream_sid(self, stream_sid: Optional[str]) -> None:
+        # media and mark frames only vary by the stream sid and the base64
+        # audio payload, so build them from templates instead of send_json
+        self.stream_sid = stream_sid
+        stream_sid_json = orjson.dumps(stream_sid).decode()
+        self._media_prefix = (
+            f'{{"event":"media","streamSid":{stream_sid_json},'
+            '"media":{"payload":"'
+        )
+        self._mark_event = (
+            f'{{"event":"mark","streamSid":{stream_sid_json},'
+            '"mark":{"name":"responsePart"}}'
+        )
+
     async def _cleanup(self) -> None:
         phone_call_id, duration = await self.ai_caller.close(
             self._hang_up_reason or PhoneCallEndReason.unknown
@@ -147,7 +166,7 @@ class CallRouter:
             async for message in self.ai_caller:
                 if message["type"] == "response.function_call_arguments.done":
                     if message["name"] == "hang_up":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         if arguments["reason"] == "answering_machine":
                             self._hang_up_reason = (
                                 PhoneCallEndReason.voice_mail_bot
@@ -165,7 +184,7 @@ class CallRouter:
                         self._hang_up_reason = None
                         logger.info("Hang up cancelled")
                     elif message["name"] == "query_documents":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         query = arguments["query"]
                         documents = await query_documents(
                             query,
@@ -179,17 +198,17 @@ class CallRouter:
                             documents,
                         )
                     elif message["name"] == "send_text_message":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         await self._send_text_message(
                             arguments["message"],
                         )
                     elif message["name"] == "transfer_call":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         await self._transfer_call(
                             arguments["phone_number_label"]
                         )
                     elif message["name"] == "enter_keypad":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         send_digits(self.call_sid, arguments["digits"])
                     else:
                         logger.warning(
@@ -197,14 +216,11 @@ class CallRouter:
                         )
 
                 if message["type"] == "response.audio.delta":
-                    audio_delta = {
-                        "event": "media",
-                        "streamSid": self.stream_sid,
-                        "media": {
-                            "payload": message["delta"],
-                        },
-                    }
-                    await websocket.send_json(audio_delta)
+                    await websocket.send_text(
+                        self._media_prefix
+                        + message["delta"]
+                        + TWILIO_MEDIA_SUFFIX
+                    )
 
                     if self.last_ai_item_id is None:
                         self.last_ai_item_id = message["item_id"]
@@ -213,12 +229,7 @@ class CallRouter:
                         self.mark_queue.clear()
 
                     if self.stream_sid is not None:
-                        mark_event = {
-                            "event": "mark",
-                            "streamSid": self.stream_sid,
-                            "mark": {"name": "responsePart"},
-                        }
-                        await websocket.send_json(mark_event)
+                        await websocket.send_text(self._mark_event)
                         self.mark_queue.append(message["audio_ms"])
 
                 if message["type"] == "input_audio_buffer.speech_started":
@@ -263,13 +274,13 @@ class CallRouter:
     async def receive_from_human_call(self, websocket: WebSocket):
         try:
             async for message in websocket.iter_text():
-                data = json.loads(message)
+                data = orjson.loads(message)
                 if data["event"] == "media":
                     await self.ai_caller.receive_human_audio(
                         data["media"]["payload"]
                     )
                 elif data["event"] == "start":
-                    self.stream_sid = data["start"]["streamSid"]
+                    self._set_stream_sid(data["start"]["streamSid"])
                     self.last_ai_item_id = None
                     self.mark_queue_elapsed_time = 0
                     self.mark_queue.clear()
@@ -323,12 +334,65 @@ class BrowserRouter:
         self.ai_caller = ai_caller
         self._hang_up_reason = None
         self._cleanup_started = False
+        self._pending_media: list[str] = []
+        self._media_flush_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+
+    async def _flush_media(self, websocket: WebSocket) -> None:
+        # must be called while holding the send lock
+        if len(self._pending_media) == 0:
+            return
+        payloads, self._pending_media = self._pending_media, []
+        # the deltas are base64 from openai and need no json escaping
+        await websocket.send_text(
+            '{"event":"media_batch","payloads":["'
+            + '","'.join(payloads)
+            + '"]}'
+        )
+
+    async def _flush_media_after_window(self, websocket: WebSocket) -> None:
+        await asyncio.sleep(MEDIA_BATCH_WINDOW_S)
+        self._media_flush_task = None
+        try:
+            async with self._send_lock:
+                await self._flush_media(websocket)
+        except Exception:
+            logger.exception("Error sending media batch")
+
+    def _queue_media(self, payload: str, websocket: WebSocket) -> None:
+        # audio deltas arriving within the window are sent as one frame
+        self._pending_media.append(payload)
+        if self._media_flush_task is None:
+            self._media_flush_task = asyncio.create_task(
+                self._flush_media_after_window(websocket)
+            )
+
+    async def _send_text(self, data: str, websocket: WebSocket) -> None:
+        async with self._send_lock:
+            # send any buffered audio first so events stay in order
+            await self._flush_media(websocket)
+            await websocket.send_text(data)
+
+    async def _send_json(self, data: dict, websocket: WebSocket) -> None:
+        await self._send_text(orjson.dumps(data).decode(), websocket)
+
+    async def _send_speaker_segments(
+        self, speaker_segments_json: bytes, websocket: WebSocket
+    ) -> None:
+        await self._send_text(
+            '{"event":"speaker_segments","payload":'
+            + speaker_segments_json.decode()
+            + "}",
+            websocket,
+        )
 
     async def _cleanup(self) -> None:
         if self._cleanup_started:
             logger.info("Cleanup already started")
             return
         self._cleanup_started = True
+        if self._media_flush_task is not None:
+            self._media_flush_task.cancel()
         logger.info(f"Closing call with reason: {self._hang_up_reason}")
         phone_call_id, duration = await self.ai_caller.close(
             self._hang_up_reason or PhoneCallEndReason.unknown
@@ -347,11 +411,12 @@ class BrowserRouter:
     async def _send_text_message(
         self, body: str, websocket: WebSocket
     ) -> None:
-        await websocket.send_json(
+        await self._send_json(
             {
                 "event": "message",
                 "payload": {"title": "SMS Message", "body": body},
-            }
+            },
+            websocket,
         )
         async with async_session_scope() as db:
             await insert_text_message(
@@ -384,14 +449,15 @@ class BrowserRouter:
                 f"Transfer call number not found: {phone_number_label}, call will not be transferred"
             )
         else:
-            await websocket.send_json(
+            await self._send_json(
                 {
                     "event": "message",
                     "payload": {
                         "title": "Call Transer",
                         "body": f"Call would be transferred to {transfer_call_number}",
                     },
-                }
+                },
+                websocket,
             )
             self._hang_up_reason = PhoneCallEndReason.transferred
 
@@ -402,16 +468,17 @@ class BrowserRouter:
                     if message["name"] == "hang_up":
                         hang_up_sound = get_sound_base64("hang_up_sound_24k")
                         if hang_up_sound is not None:
-                            await websocket.send_json(
+                            await self._send_json(
                                 {
                                     "event": "media",
                                     "payload": hang_up_sound[0],
-                                }
+                                },
+                                websocket,
                             )
                             self.mark_queue.append(hang_up_sound[1])
                         else:
                             logger.warning("Hang up sound not found")
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         if arguments["reason"] == "answering_machine":
                             self._hang_up_reason = (
                                 PhoneCallEndReason.voice_mail_bot
@@ -428,7 +495,7 @@ class BrowserRouter:
                         self._hang_up_reason = None
                         logger.info("Hang up cancelled")
                     elif message["name"] == "query_documents":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         query = arguments["query"]
                         documents = await query_documents(
                             query,
@@ -442,26 +509,27 @@ class BrowserRouter:
                             documents,
                         )
                     elif message["name"] == "send_text_message":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         await self._send_text_message(
                             arguments["message"],
                             websocket,
                         )
                     elif message["name"] == "transfer_call":
-                        arguments = json.loads(message["arguments"])
+                        arguments = orjson.loads(message["arguments"])
                         await self._transfer_call(
                             arguments["phone_number_label"], websocket
                         )
                     elif message["name"] == "enter_keypad":
-                        arguments = json.loads(message["arguments"])
-                        await websocket.send_json(
+                        arguments = orjson.loads(message["arguments"])
+                        await self._send_json(
                             {
                                 "event": "message",
                                 "payload": {
                                     "title": "Keypad",
                                     "body": arguments["digits"],
                                 },
-                            }
+                            },
+                            websocket,
                         )
                     else:
                         logger.warning(
@@ -469,9 +537,7 @@ class BrowserRouter:
                         )
 
                 elif message["type"] == "response.audio.delta":
-                    await websocket.send_json(
-                        {"event": "media", "payload": message["delta"]}
-                    )
+                    self._queue_media(message["delta"], websocket)
 
                     if self.last_ai_item_id is None:
                         self.last_ai_item_id = message["item_id"]
@@ -483,26 +549,13 @@ class BrowserRouter:
                 elif message["type"] == "input_audio_buffer.speech_started":
                     await self.handle_speech_started(websocket)
 
-                elif message["type"] == "response.audio_transcript.done":
-                    await websocket.send_json(
-                        {
-                            "event": "speaker_segments",
-                            "payload": jsonable_encoder(
-                                message["speaker_segments"]
-                            ),
-                        },
-                    )
                 elif (
-                    message["type"]
+                    message["type"] == "response.audio_transcript.done"
+                    or message["type"]
                     == "conversation.item.input_audio_transcription.completed"
                 ):
-                    await websocket.send_json(
-                        {
-                            "event": "speaker_segments",
-                            "payload": jsonable_encoder(
-                                message["speaker_segments"]
-                            ),
-                        }
+                    await self._send_speaker_segments(
+                        message["speaker_segments_json"], websocket
                     )
         except WebSocketDisconnect:
             logger.info("Connection closed")
@@ -544,7 +597,9 @@ class BrowserRouter:
     async def handle_speech_started(self, websocket: WebSocket):
         if len(self.mark_queue) > 0:
             await self._truncate_audio_message()
-            await websocket.send_json({"event": "clear"})
+            # buffered audio would be cleared anyway, don't send it
+            self._pending_media.clear()
+            await self._send_json({"event": "clear"}, websocket)
 
             self.mark_queue.clear()
         self.last_ai_item_id = None
@@ -554,7 +609,7 @@ class BrowserRouter:
     async def receive_from_human_call(self, websocket: WebSocket):
         try:
             async for message in websocket.iter_text():
-                data = json.loads(message)
+                data = orjson.loads(message)
                 if data["event"] == "media":
                     await self.ai_caller.receive_human_audio(data["payload"])
                 elif data["event"] == "start":
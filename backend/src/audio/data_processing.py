@@ -29,7 +29,11 @@ def process_audio_data(
     segment_indices_to_remove = set()
     input_item_time_elapsed = 0
     output_item_time_elapsed = 0
-    for line in file_str.splitlines():
+    # log entries are raw utf-8 json, which may contain characters such as
+    # u+2028 that splitlines() would also break on, so only split on "\n"
+    for line in file_str.split("\n"):
+        if not line:
+            continue
         # exlcude timestamp
         line_data = json.loads(line.split("]", 1)[1].strip())
         if line_data["type"] == "input_audio_buffer.speech_started":
@@ -256,6 +260,15 @@ def audio_bytes_to_ms(
     return int((len(audio_bytes) / bytes_per_sample) * 1000 / sample_rate)
 
 
+def b64_audio_to_ms(
+    audio_b64: str, bytes_per_sample: int, sample_rate: int
+) -> int:
+    # decoded size follows from the base64 length, no need to decode
+    padding = audio_b64.endswith("=") + audio_b64.endswith("==")
+    num_bytes = (len(audio_b64) * 3) // 4 - padding
+    return (num_bytes * 1000) // (bytes_per_sample * sample_rate)
+
+
 def pcm_to_wav_buffer(audio_data: bytes, sample_rate: int) -> io.BytesIO:
     wav_buffer = io.BytesIO()
     with wave.open(wav_buffer, "wb") as wav_file:
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import AsyncExitStack
 from typing import AsyncContextManager, Optional
@@ -72,3 +73,25 @@ class S3Client(AsyncContextManager["S3Client"]):
             else:
                 raise e
         return True
+
+
+_shared_s3_client: Optional[S3Client] = None
+_shared_s3_client_lock = asyncio.Lock()
+
+
+async def get_shared_s3_client() -> S3Client:
+    # reuse one connected client instead of a new session per upload
+    global _shared_s3_client
+    if _shared_s3_client is None:
+        async with _shared_s3_client_lock:
+            if _shared_s3_client is None:
+                _shared_s3_client = await S3Client().__aenter__()
+    return _shared_s3_client
+
+
+async def close_shared_s3_client() -> None:
+    global _shared_s3_client
+    async with _shared_s3_client_lock:
+        if _shared_s3_client is not None:
+            await _shared_s3_client.__aexit__(None, None, None)
+            _shared_s3_client = None
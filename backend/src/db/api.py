@@ -136,7 +136,7 @@ async def insert_agent(
     user_id: str,
     organization_id: str,
     db: async_scoped_session,
-) -> SerializedUUID:
+) -> dict:
     if payload.active is True:
         # disable all other agents with the same base_id
         await db.execute(
@@ -150,10 +150,13 @@ async def insert_agent(
         "organization_id": organization_id,
     }
 
+    # return the whole row so callers don't need to select it again
     result = await db.execute(
-        insert(AgentModel).returning(AgentModel.id).values(insert_values)
+        insert(AgentModel)
+        .returning(AgentModel.__table__)
+        .values(insert_values)
     )
-    return result.scalar_one()
+    return dict(result.mappings().one())
 
 
 def _base_agent_query() -> Select:
@@ -185,12 +188,24 @@ async def get_agent_by_incoming_phone_number(
     return result.scalar_one_or_none()
 
 
+async def get_agent_phone_numbers(
+    base_id: SerializedUUID, db: async_scoped_session
+) -> list[AgentPhoneNumberModel]:
+    result = await db.execute(
+        select(AgentPhoneNumberModel).where(
+            AgentPhoneNumberModel.base_agent_id == base_id
+        )
+    )
+    return list(result.scalars().all())
+
+
 async def get_agents(
     organization_id: str, db: async_scoped_session
 ) -> list[AgentModel]:
     result = await db.execute(
         select(AgentModel)
-        .options(selectinload(AgentModel.user))
+        # many-to-one, join it in the main query instead of a second select
+        .options(joinedload(AgentModel.user).load_only(UserModel.email))
         .options(selectinload(AgentModel.phone_numbers))
         .where(AgentModel.organization_id == organization_id)
         .order_by(AgentModel.created_at.desc())
@@ -28,17 +28,18 @@ def latest_phone_call_event(phone_call: PhoneCallModel) -> Optional[dict]:
     if len(phone_call.events) == 0:
         return None
     # filter out media stream events
-    relevant_events = [
-        event
+    relevant_payloads = [
+        event.payload
         for event in phone_call.events
         if event.payload.get("CallStatus") is not None
     ]
-    if len(relevant_events) == 0:
+    if len(relevant_payloads) == 0:
         return None
-    return sorted(
-        relevant_events,
-        key=lambda event: int(event.payload["SequenceNumber"]),
-    )[-1].payload
+    # reversed so ties resolve to the last event, as the stable sort did
+    return max(
+        reversed(relevant_payloads),
+        key=lambda payload: int(payload["SequenceNumber"]),
+    )
 
 
 def convert_phone_call_model(phone_call: PhoneCallModel) -> PhoneCallMetadata:
@@ -85,24 +86,59 @@ def convert_agent_phone_number(
     )
 
 
-def convert_agent_model(agent: AgentModel) -> Agent:
-    return Agent(
-        base_id=cast(SerializedUUID, agent.base_id),
-        name=cast(str, agent.name),
-        id=cast(SerializedUUID, agent.id),
-        created_at=agent.created_at,
-        system_message=cast(str, agent.system_message),
-        active=cast(bool, agent.active),
-        sample_values=cast(Optional[dict], agent.sample_values) or {},
-        user_email=cast(str, agent.user.email),
-        tool_configuration=cast(Optional[dict], agent.tool_configuration)
-        or {},
+def _construct_agent_phone_number(
+    agent_phone_number: AgentPhoneNumberModel,
+) -> AgentPhoneNumber:
+    return AgentPhoneNumber.model_construct(
+        id=agent_phone_number.id,
+        phone_number=agent_phone_number.phone_number,
+        incoming=agent_phone_number.incoming,
+    )
+
+
+AGENT_ROW_FIELDS = (
+    "base_id",
+    "name",
+    "id",
+    "created_at",
+    "system_message",
+    "active",
+    "sample_values",
+    "tool_configuration",
+)
+
+
+def construct_agent_row(
+    agent_row: dict,
+    user_email: str,
+    phone_numbers: list[AgentPhoneNumberModel],
+) -> Agent:
+    # values come straight from the db, so skip validation
+    return Agent.model_construct(
+        base_id=agent_row["base_id"],
+        name=agent_row["name"],
+        id=agent_row["id"],
+        created_at=agent_row["created_at"],
+        system_message=agent_row["system_message"],
+        active=agent_row["active"],
+        sample_values=agent_row["sample_values"] or {},
+        user_email=user_email,
+        tool_configuration=agent_row["tool_configuration"] or {},
+        test_values=None,
         phone_numbers=[
-            convert_agent_phone_number(item) for item in agent.phone_numbers
+            _construct_agent_phone_number(item) for item in phone_numbers
         ],
     )
 
 
+def construct_agent_model(agent: AgentModel) -> Agent:
+    return construct_agent_row(
+        {field: getattr(agent, field) for field in AGENT_ROW_FIELDS},
+        agent.user.email,
+        agent.phone_numbers,
+    )
+
+
 def convert_analytics_tag_group_model(
     tag_group: AnalyticsTagGroupModel,
 ) -> AnalyticsGroup:
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Annotated, Literal, Optional, Union, cast
+from typing import Annotated, Callable, Literal, Optional, Union, cast
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, PlainSerializer, model_serializer
@@ -14,11 +14,9 @@ Voice = Literal[
     "alloy", "ash", "ballad", "coral", "echo", "sage", "shimmer", "verse"
 ]
 
-SerializedUUID = Annotated[
-    UUID, PlainSerializer(lambda x: str(x), return_type=str)
-]
+SerializedUUID = Annotated[UUID, PlainSerializer(str, return_type=str)]
 SerializedDateTime = Annotated[
-    datetime, PlainSerializer(lambda x: x.isoformat(), return_type=str)
+    datetime, PlainSerializer(datetime.isoformat, return_type=str)
 ]
 
 
@@ -161,6 +159,31 @@ class Prediction(BaseModel):
     content: Union[str, list[ModelChatContent]]
 
 
+MODEL_EXCLUDED_FIELDS: dict[ModelType, frozenset[str]] = {
+    ModelType.gpto1: frozenset(["temperature", "stop"]),
+}
+CLAUDE_UNSUPPORTED_FIELDS = (
+    "n",
+    "stop",
+    "logprobs",
+    "top_logprobs",
+    "response_format",
+    "stream_options",
+)
+
+
+def _format_claude_input(output: dict) -> dict:
+    output["max_tokens"] = output.pop("max_completion_tokens") or 8192
+    for field in CLAUDE_UNSUPPORTED_FIELDS:
+        del output[field]
+    return output
+
+
+MODEL_POST_PROCESS: dict[ModelType, Callable[[dict], dict]] = {
+    ModelType.claude35: _format_claude_input,
+}
+
+
 class OpenAiChatInput(BaseModel):
     messages: list[ModelChat]
     model: ModelType
@@ -179,28 +202,21 @@ class OpenAiChatInput(BaseModel):
 
     @property
     def data(self) -> dict:
-        exclusion = set()
+        exclusion = set(MODEL_EXCLUDED_FIELDS.get(self.model, ()))
         if self.tools is None:
             exclusion.add("tools")
         if self.tool_choice is None:
             exclusion.add("tool_choice")
-        if self.stream is True:
-            self.stream_options = StreamOptions(include_usage=True)
-        if self.model == ModelType.gpto1:
-            exclusion.add("temperature")
-            exclusion.add("stop")
         output = self.model_dump(
             exclude=exclusion,
         )
-        if self.model == ModelType.claude35:
-            output["max_tokens"] = self.max_completion_tokens or 8192
-            del output["max_completion_tokens"]
-            del output["n"]
-            del output["stop"]
-            del output["logprobs"]
-            del output["top_logprobs"]
-            del output["response_format"]
-            del output["stream_options"]
+        if self.stream is True:
+            output["stream_options"] = StreamOptions(
+                include_usage=True
+            ).model_dump()
+        post_process = MODEL_POST_PROCESS.get(self.model)
+        if post_process is not None:
+            output = post_process(output)
         return output
 
 
@@ -308,6 +324,7 @@ class Agent(AgentBase):
 
 class AiMessageEventTypes(str, Enum):
     speaker = "speaker"
+    speaker_delta = "speaker_delta"
     call_end = "call_end"
     audio = "audio"
 
@@ -1,8 +1,13 @@
+import hashlib
 import logging
-from typing import cast
+from collections import defaultdict
+from typing import Optional, cast
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+import orjson
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import async_scoped_session
 
@@ -14,6 +19,7 @@ from src.ai.sample_values import generate_sample_values
 from src.auth import User, require_user
 from src.db.api import (
     get_agent,
+    get_agent_phone_numbers,
     get_agents,
     get_analytics_report,
     insert_agent,
@@ -21,13 +27,9 @@ from src.db.api import (
     update_agent_tool_configuration,
 )
 from src.db.base import get_session
-from src.db.converter import convert_agent_model
-from src.helixion_types import (
-    Agent,
-    AgentBase,
-    SerializedUUID,
-    TransferCallNumber,
-)
+from src.db.converter import construct_agent_model, construct_agent_row
+from src.db.models import AgentModel
+from src.helixion_types import AgentBase, SerializedUUID, TransferCallNumber
 
 logger = logging.getLogger(__name__)
 
@@ -37,18 +39,74 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+AGENTS_CACHE_TTL_S = 60
+
+# org id -> (version, body, etag), versions are bumped on every agent write
+agents_cache: TTLCache[str, tuple[int, bytes, str]] = TTLCache(
+    maxsize=256, ttl=AGENTS_CACHE_TTL_S
+)
+agents_cache_versions: defaultdict[str, int] = defaultdict(int)
+
+# per agent json, reused across listings when only some agents changed
+agent_json_cache: LRUCache[tuple, bytes] = LRUCache(maxsize=4096)
+
+
+def _invalidate_agents_cache(organization_id: str) -> None:
+    agents_cache_versions[organization_id] += 1
+    agents_cache.pop(organization_id, None)
+
+
+def _agent_json(agent: AgentModel) -> bytes:
+    cache_key = (
+        agent.id,
+        agent.updated_at,
+        agent.user.email,
+        tuple(
+            (item.id, item.phone_number, item.incoming)
+            for item in agent.phone_numbers
+        ),
+    )
+    agent_json = agent_json_cache.get(cache_key)
+    if agent_json is None:
+        # rows are already trusted, skip the response model validation pass
+        agent_json = orjson.dumps(construct_agent_model(agent).model_dump())
+        agent_json_cache[cache_key] = agent_json
+    return agent_json
+
+
+def _agents_response(
+    body: bytes, etag: str, if_none_match: Optional[str]
+) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
+
 
 @router.get(
     "/all",
-    response_model=list[Agent],
     dependencies=[Depends(require_user)],
 )
 async def retrieve_all_agents(
     user: User = Depends(require_user),
     db: async_scoped_session = Depends(get_session),
-) -> list[Agent]:
-    agents = await get_agents(cast(str, user.active_org_id), db)
-    return [convert_agent_model(agent) for agent in agents]
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    organization_id = cast(str, user.active_org_id)
+    version = agents_cache_versions[organization_id]
+    cached = agents_cache.get(organization_id)
+    if cached is not None and cached[0] == version:
+        return _agents_response(cached[1], cached[2], if_none_match)
+
+    agents = await get_agents(organization_id, db)
+    body = b"[" + b",".join([_agent_json(agent) for agent in agents]) + b"]"
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    # a write may have landed while we were reading, don't cache stale rows
+    if agents_cache_versions[organization_id] == version:
+        agents_cache[organization_id] = (version, body, etag)
+    return _agents_response(body, etag, if_none_match)
 
 
 class NewAgentVersionRequest(BaseModel):
@@ -58,13 +116,13 @@ class NewAgentVersionRequest(BaseModel):
 
 @router.post(
     "/new-version",
-    response_model=Agent,
+    response_class=ORJSONResponse,
 )
 async def create_new_agent_version(
     request: NewAgentVersionRequest,
     user: User = Depends(require_user),
     db: async_scoped_session = Depends(get_session),
-) -> Agent:
+) -> ORJSONResponse:
     if len(request.new_fields) > 0:
         new_field_sample_values = await generate_sample_values(
             request.new_fields
@@ -73,16 +131,20 @@ async def create_new_agent_version(
             **new_field_sample_values,
             **request.agent_base.sample_values,
         }
-    new_agent_id = await insert_agent(
+    new_agent = await insert_agent(
         request.agent_base,
         user.user_id,
         cast(str, user.active_org_id),
         db,
     )
-    new_agent_model = await get_agent(new_agent_id, db)
-    response = convert_agent_model(new_agent_model)
+    phone_numbers = await get_agent_phone_numbers(
+        request.agent_base.base_id, db
+    )
+    response = construct_agent_row(new_agent, user.email, phone_numbers)
     await db.commit()
-    return response
+    _invalidate_agents_cache(cast(str, user.active_org_id))
+    # built from the inserted row, skip the response model validation pass
+    return ORJSONResponse(response.model_dump())
 
 
 class NewAgentRequest(BaseModel):
@@ -91,15 +153,15 @@ class NewAgentRequest(BaseModel):
 
 @router.post(
     "/new-agent",
-    response_model=Agent,
+    response_class=ORJSONResponse,
 )
 async def create_agent(
     request: NewAgentRequest,
     user: User = Depends(require_user),
     db: async_scoped_session = Depends(get_session),
-) -> Agent:
+) -> ORJSONResponse:
     base_id = uuid4()
-    agent_id = await insert_agent(
+    new_agent = await insert_agent(
         AgentBase(
             name=request.name,
             system_message=default_system_prompt,
@@ -112,10 +174,12 @@ async def create_agent(
         cast(str, user.active_org_id),
         db,
     )
-    new_agent_model = await get_agent(agent_id, db)
-    response = convert_agent_model(new_agent_model)
+    # a brand new base id has no phone numbers yet
+    response = construct_agent_row(new_agent, user.email, [])
     await db.commit()
-    return response
+    _invalidate_agents_cache(cast(str, user.active_org_id))
+    # built from the inserted row, skip the response model validation pass
+    return ORJSONResponse(response.model_dump())
 
 
 class KnowledgeBaseMetadata(BaseModel):
@@ -161,6 +225,7 @@ async def update_tool_configuration(
     }
     await update_agent_tool_configuration(agent_id, tool_configuration, db)
     await db.commit()
+    _invalidate_agents_cache(cast(str, user.active_org_id))
     return tool_configuration
 
 
@@ -211,7 +276,7 @@ async def update_instructions_from_report(
         cast(str, agent.system_message), cast(str, report.text)
     )
     base_id = cast(SerializedUUID, agent.base_id)
-    new_agent_id = await insert_agent(
+    new_agent = await insert_agent(
         AgentBase(
             name=cast(str, agent.name),
             system_message=updated_instructions,
@@ -225,9 +290,10 @@ async def update_instructions_from_report(
         db,
     )
     await db.commit()
+    _invalidate_agents_cache(cast(str, user.active_org_id))
     return UpdateInstructionsFromReportResponse(
         base_id=base_id,
-        version_id=new_agent_id,
+        version_id=new_agent["id"],
     )
 
 
@@ -251,4 +317,5 @@ async def activate_version(
         version_id, cast(SerializedUUID, agent.base_id), db
     )
     await db.commit()
+    _invalidate_agents_cache(cast(str, user.active_org_id))
     return Response(status_code=204)
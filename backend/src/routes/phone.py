@@ -353,22 +353,28 @@ async def listen_in(
 
     async def listen_in_stream(
         phone_call_id: SerializedUUID,
-    ) -> AsyncGenerator[str, None]:
-        queue = call_messages[phone_call_id].queue
-        while True:
-            message = await queue.get()
-            call_ended = message.type == AiMessageEventTypes.call_end
-            if call_ended:
-                hang_up_sound = get_sound_base64("hang_up_sound_8k")
-                if hang_up_sound is not None:
-                    yield AiMessage(
-                        type=AiMessageEventTypes.audio,
-                        data=hang_up_sound[0],
-                        metadata={},
-                    ).serialized
-            yield message.serialized
-            if call_ended:
-                break
+    ) -> AsyncGenerator[bytes, None]:
+        message_queue = call_messages[phone_call_id]
+        call_ended = False
+        while not call_ended:
+            # send everything already queued as a single chunk
+            chunk: list[bytes] = []
+            for message in await message_queue.drain():
+                call_ended = message.type == AiMessageEventTypes.call_end
+                if call_ended:
+                    hang_up_sound = get_sound_base64("hang_up_sound_8k")
+                    if hang_up_sound is not None:
+                        chunk.append(
+                            AiMessage(
+                                type=AiMessageEventTypes.audio,
+                                data=hang_up_sound[0],
+                                metadata={},
+                            ).serialized
+                        )
+                chunk.append(message.serialized)
+                if call_ended:
+                    break
+            yield b"".join(chunk)
 
     return StreamingResponse(
         listen_in_stream(phone_call_id), media_type="application/x-ndjson"
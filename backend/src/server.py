@@ -5,7 +5,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 
+from src.ai.api import model_client
 from src.audio.sounds import initialize_sounds_cache
+from src.aws_utils import close_shared_s3_client
 from src.db.base import db_setup, shutdown_session
 from src.routes import agent, analytics, browser, knowledge_base, phone, user
 from src.settings import settings, setup_logging
@@ -26,6 +28,8 @@ async def lifespan(app: FastAPI):
     await initialize_sounds_cache()
     yield
     await shutdown_session()
+    await close_shared_s3_client()
+    await model_client.aclose()
 
 
 app = FastAPI(
@@ -0,0 +1,37 @@
+import base64
+import os
+
+import pytest
+
+from src.audio.data_processing import audio_bytes_to_ms, b64_audio_to_ms
+
+# (bytes per sample, sample rate) for g711 and pcm16
+AUDIO_FORMATS = [(1, 8000), (2, 24000)]
+
+
+@pytest.mark.parametrize("bytes_per_sample, sample_rate", AUDIO_FORMATS)
+@pytest.mark.parametrize(
+    "num_bytes",
+    # typical twilio and browser frame sizes, with every padding case
+    [0, 1, 2, 3, 160, 161, 162, 480, 960, 4800, 4801, 4802],
+)
+def test_b64_audio_to_ms_matches_decoded_length(
+    bytes_per_sample: int, sample_rate: int, num_bytes: int
+):
+    audio_b64 = base64.b64encode(os.urandom(num_bytes)).decode()
+    assert b64_audio_to_ms(
+        audio_b64, bytes_per_sample, sample_rate
+    ) == audio_bytes_to_ms(
+        base64.b64decode(audio_b64), bytes_per_sample, sample_rate
+    )
+
+
+@pytest.mark.parametrize("bytes_per_sample, sample_rate", AUDIO_FORMATS)
+def test_b64_audio_to_ms_across_sizes(bytes_per_sample: int, sample_rate: int):
+    for num_bytes in range(0, 6000, 7):
+        audio_b64 = base64.b64encode(bytes(num_bytes)).decode()
+        assert b64_audio_to_ms(
+            audio_b64, bytes_per_sample, sample_rate
+        ) == audio_bytes_to_ms(
+            base64.b64decode(audio_b64), bytes_per_sample, sample_rate
+        )
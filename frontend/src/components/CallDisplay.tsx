@@ -223,6 +223,15 @@ export const LiveCallDisplay = (props: {
           break;
         } else if (payload.type === "speaker") {
           setSpeakerSegments(payload.data);
+        } else if (payload.type === "speaker_delta") {
+          const { index, segment } = payload.data;
+          setSpeakerSegments((segments) => {
+            // wait for the next full snapshot if an update was missed
+            if (index > segments.length) return segments;
+            const updated = [...segments];
+            updated[index] = segment;
+            return updated;
+          });
         } else {
           const pcm16Data = atob(payload.data);
           const buffer = new ArrayBuffer(pcm16Data.length);
@@ -323,6 +332,25 @@ export const BrowserCallDisplay = (props: {
   const websocketRef = useRef<WebSocket | null>(null);
   const outputWorkletRef = useRef<AudioWorkletNode | null>(null);
 
+  const playAudio = (payload: string) => {
+    // Send the base64 data directly to the worklet for processing
+    const pcm16Data = atob(payload);
+    const buffer = new ArrayBuffer(pcm16Data.length);
+    const view = new Uint8Array(buffer);
+
+    for (let i = 0; i < pcm16Data.length; i++) {
+      view[i] = pcm16Data.charCodeAt(i);
+    }
+
+    outputWorkletRef.current?.port.postMessage(
+      {
+        type: "process-audio",
+        payload: view,
+      },
+      [buffer]
+    );
+  };
+
   const connectWebSocket = (phoneCallId: string) => {
     const ws = new WebSocket(getBrowserCallUrl(phoneCallId));
 
@@ -354,22 +382,10 @@ export const BrowserCallDisplay = (props: {
             type: "clear-buffers",
           });
         } else if (data.event === "media") {
-          // Send the base64 data directly to the worklet for processing
-          const pcm16Data = atob(data.payload);
-          const buffer = new ArrayBuffer(pcm16Data.length);
-          const view = new Uint8Array(buffer);
-
-          for (let i = 0; i < pcm16Data.length; i++) {
-            view[i] = pcm16Data.charCodeAt(i);
-          }
-
-          outputWorkletRef.current?.port.postMessage(
-            {
-              type: "process-audio",
-              payload: view,
-            },
-            [buffer]
-          );
+          playAudio(data.payload);
+        } else if (data.event === "media_batch") {
+          // each payload is played as its own chunk so marks stay 1:1
+          data.payloads.forEach(playAudio);
         } else if (data.event === "speaker_segments") {
           setSpeakerSegments(data.payload);
         } else if (data.event === "message") {
@@ -69,6 +69,10 @@ type MetadataEvent =
       type: "speaker";
       data: SpeakerSegment[];
     }
+  | {
+      type: "speaker_delta";
+      data: { index: number; segment: SpeakerSegment };
+    }
   | {
       type: "audio";
       data: string;